@@ -0,0 +1,44 @@
+import time
+from bisect import bisect_right
+
+# Data newer than this may still arrive late upstream, so it is never marked covered
+SETTLE_SECONDS = 3600
+
+
+def settled_until(now=None):
+    """Latest UNIX second that is old enough to be treated as final."""
+    return int(time.time() if now is None else now) - SETTLE_SECONDS
+
+
+def missing_ranges(intervals, start_unix, end_unix):
+    """Parts of [start_unix, end_unix] not inside any of the sorted, disjoint intervals."""
+    missing = []
+    cursor = start_unix
+    for lo, hi in intervals:
+        if hi < cursor:
+            continue
+        if lo > end_unix:
+            break
+        if lo > cursor:
+            missing.append((cursor, lo - 1))
+        cursor = hi + 1
+    if cursor <= end_unix:
+        missing.append((cursor, end_unix))
+    return missing
+
+
+def add_interval(intervals, lo, hi):
+    """Return the sorted, disjoint intervals with [lo, hi] merged in."""
+    merged = []
+    for a, b in sorted([*intervals, (lo, hi)]):
+        if merged and a <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], b))
+        else:
+            merged.append((a, b))
+    return merged
+
+
+def contains(intervals, t):
+    """True if t falls inside one of the sorted, disjoint intervals."""
+    k = bisect_right(intervals, (t, float("inf"))) - 1
+    return k >= 0 and intervals[k][1] >= t
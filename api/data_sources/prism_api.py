@@ -83,13 +83,14 @@ def requestPrismTempData(startTime: str, endTime: str):
 # print(result)
 
 
-def requestPrismRainData(startTime: str, endTime: str):
+def requestPrismRainData(startTime: str, endTime: str, locationId: int = 18):
     """
-    Fetch Rain Guage 11 data from ADS PRISM API.
+    Fetch rain gauge data (Rain Guage 11 by default) from ADS PRISM API.
 
     Args:
         startTime: ISO 8601 formatted datetime string (e.g. '2025-03-01T00:00:00')
         endTime: ISO 8601 formatted datetime string (e.g. '2025-03-01T23:59:59')
+        locationId: PRISM location ID of the rain gauge (18 = RG11)
 
     Returns:
         Dict containing the API response data"
@@ -99,7 +100,6 @@ def requestPrismRainData(startTime: str, endTime: str):
     endArr = endTime.split(":")
 
     entityId = 2123  # RAIN (Verify for FY)
-    locationId = 18  # RG11 (Verify for FY)
 
     PRISM_RG_API_TOKEN = os.getenv("NEXT_PUBLIC_PRISM_RG_API_TOKEN")
     apiKey = PRISM_RG_API_TOKEN
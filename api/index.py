@@ -3,10 +3,24 @@ from fastapi.middleware.cors import CORSMiddleware
 from api.data_sources.prism_api import requestPrismDepthData, requestPrismRainData
 from api.data_sources.mhm_api import fetchMHMLevelData
 from api.data_sources.pi_data import pullPiData
+from api.rollups import (
+    RESOLUTIONS,
+    local_to_unix,
+    pick_resolution,
+    store,
+    unix_to_iso,
+)
+from api.rain_index import rain_index
+from api.coverage import settled_until
 from datetime import datetime
+import time
 
 app = FastAPI(docs_url="/api/py/docs", openapi_url="/api/py/openapi.json")
 
+# Rain gauges available to the rain index: name -> PRISM locationId
+RAIN_GAUGES = {"RG11": 18}
+SITE_RAIN_GAUGE = "RG11"  # gauge shown on the site views
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -22,6 +36,108 @@ def mm_to_inches(mm):
     return round(mm / 25.4, 2)
 
 
+def prism_points(raw):
+    """Flatten a PRISM Telemetry response into [(unixSeconds, reading), ...]."""
+    entity = raw[0]["entityData"][0] if raw and raw[0].get("entityData") else {}
+    return [
+        (local_to_unix(p["dateTime"]), p["reading"])
+        for p in entity.get("data", [])
+        if p.get("reading") is not None
+    ]
+
+
+def mhm_level_points(raw):
+    """Flatten a fetchMHMLevelData result into [(unixSeconds, levelIn), ...]."""
+    return [
+        (p["t"], p["levelMm"] / 25.4)  # inches, rounded on output
+        for p in raw.get("measurements", [])
+        if p.get("levelMm") is not None
+    ]
+
+
+def pi_points(raw):
+    """Flatten a pullPiData result into [(unixSeconds, reading), ...]."""
+    return [(local_to_unix(p["dateTime"]), p["reading"]) for p in raw["data"]]
+
+
+def cache_rollups(series, to_points, raw, start_unix, end_unix):
+    """
+    Fold a raw response fetched for a short view into the rollups so long views
+    reuse it. to_points flattens raw; failures here never affect the response.
+    """
+    try:
+        store.ingest(
+            series, to_points(raw), start_unix, min(end_unix, settled_until())
+        )
+    except Exception as e:
+        print(f"Error caching rollups for {series}: {str(e)}")
+
+
+# Raw point fetchers used to fill the rollup store: fetch(startUnix, endUnix) -> [(t, value), ...]
+def mhm_points(device_id):
+    def fetch(start_unix, end_unix):
+        return mhm_level_points(fetchMHMLevelData(start_unix, end_unix, device_id))
+
+    return fetch
+
+
+def ads_points(location_id):
+    def fetch(start_unix, end_unix):
+        return prism_points(
+            requestPrismDepthData(
+                unix_to_iso(start_unix), unix_to_iso(end_unix), location_id
+            )
+        )
+
+    return fetch
+
+
+def ebmud_points(tag):
+    def fetch(start_unix, end_unix):
+        raw = pullPiData(unix_to_iso(start_unix), unix_to_iso(end_unix), tag)
+        if raw.get("error"):
+            raise RuntimeError(raw["error"])
+        return pi_points(raw)
+
+    return fetch
+
+
+def rain_points(gauge):
+    def fetch(start_unix, end_unix):
+        return prism_points(
+            requestPrismRainData(
+                unix_to_iso(start_unix), unix_to_iso(end_unix), RAIN_GAUGES[gauge]
+            )
+        )
+
+    return fetch
+
+
+def indexed_rain_points(gauge):
+    """
+    Rollup fetcher that reads rain through the rain index, so a window pulled
+    from PRISM once serves both the rollups and rain_events.
+    """
+
+    def fetch(start_unix, end_unix):
+        idx = rain_index.ensure(gauge, rain_points(gauge), start_unix, end_unix)
+        return idx.points(start_unix, end_unix)
+
+    return fetch
+
+
+def site_summary(site):
+    return {
+        "site_id": site.get("id"),
+        "mh_id": site.get("mh_id"),
+        "mhm_id": site.get("mhm_id"),
+        "ref_source": site.get("ref_source"),
+        "ref_id": site.get("ref_id"),
+        "ref_locId": site.get("ref_locId"),
+        "coordinates": site.get("coordinates"),
+    }
+
+
 @app.get("/api/py/helloFastApi")
 def hello_fast_api():
     return {"message": "Hello from FastAPI"}
@@ -91,6 +207,65 @@ async def mhm_level(request: Request):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# Get rainfall totals, rolling 1h/6h/24h maxima and storm events (From the rain index)
+@app.post("/api/py/rain_events")
+async def rain_events(request: Request):
+    try:
+        body = await request.json()
+        startTime = body.get("startTime")
+        endTime = body.get("endTime")
+        gauge = body.get("gauge") or SITE_RAIN_GAUGE
+
+        if not startTime or not endTime:
+            raise HTTPException(
+                status_code=400, detail="startTime and endTime are required"
+            )
+        if gauge not in RAIN_GAUGES:
+            raise HTTPException(status_code=404, detail=f"Unknown rain gauge {gauge}")
+
+        try:
+            start_unix = local_to_unix(startTime)
+            end_unix = local_to_unix(endTime)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if end_unix < start_unix:
+            raise HTTPException(
+                status_code=400, detail="endTime must not be before startTime"
+            )
+        if start_unix > time.time():
+            raise HTTPException(status_code=400, detail="startTime is in the future")
+        rain_index.ensure(gauge, rain_points(gauge), start_unix, end_unix)
+        summary = rain_index.events(gauge, start_unix, end_unix)
+
+        # Report times in the same format as the PRISM readings
+        return {
+            "gauge": gauge,
+            "timeframe": {"start": startTime, "end": endTime},
+            "cumulativeIn": summary["cumulativeIn"],
+            "maxIn": {
+                name: {
+                    "dateTime": unix_to_iso(m["t"]) if m["t"] is not None else None,
+                    "valueIn": m["valueIn"],
+                }
+                for name, m in summary["maxIn"].items()
+            },
+            "events": [
+                {
+                    **event,
+                    "start": unix_to_iso(event["start"]),
+                    "end": unix_to_iso(event["end"]),
+                }
+                for event in summary["events"]
+            ],
+        }
+
+    except HTTPException:
+        raise
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.post("/api/py/site_data")
 async def site_data(req: Request):
     body = await req.json()
@@ -98,9 +273,26 @@ async def site_data(req: Request):
     startTime = body.get("startTime")
     endTime = body.get("endTime")
 
+    # Dashboard times are local wall-clock strings; parse them once for every source
+    try:
+        start_unix = local_to_unix(startTime)
+        end_unix = local_to_unix(endTime)
+    except ValueError:
+        start_unix = end_unix = None
+
+    # Long windows are served from hourly/daily rollups instead of raw points
+    resolution = None
+    if start_unix is not None:
+        resolution = pick_resolution(start_unix, end_unix)
+    if resolution:
+        return site_rollup_data(site, startTime, endTime, resolution)
+
     # --- MHM (always) ---
     try:
-        mhm_raw = fetchMHMLevelData(startTime, endTime, site["mhm_id"])
+        mhm_raw = fetchMHMLevelData(start_unix, end_unix, site["mhm_id"])
+        cache_rollups(
+            f"mhm:{site['mhm_id']}", mhm_level_points, mhm_raw, start_unix, end_unix
+        )
         mhm_series = [
             {"t": p["t"], "levelIn": mm_to_inches(p.get("levelMm"))}
             for p in mhm_raw.get("measurements", [])
@@ -122,6 +314,13 @@ async def site_data(req: Request):
     if ref_source == "ADS":
         try:
             prism_raw = requestPrismDepthData(startTime, endTime, site.get("ref_locId"))
+            cache_rollups(
+                f"ads:{site.get('ref_locId')}",
+                prism_points,
+                prism_raw,
+                start_unix,
+                end_unix,
+            )
             reference = prism_raw[0]["entityData"][0]
 
         except Exception as e:
@@ -130,6 +329,14 @@ async def site_data(req: Request):
     elif ref_source == "EBMUD":
         try:
             ebmud_raw = pullPiData(startTime, endTime, site.get("tag"))
+            if not ebmud_raw.get("error"):
+                cache_rollups(
+                    f"ebmud:{site.get('tag')}",
+                    pi_points,
+                    ebmud_raw,
+                    start_unix,
+                    end_unix,
+                )
             reference =ebmud_raw
 
         except Exception as e:
@@ -138,38 +345,128 @@ async def site_data(req: Request):
     # --- Rain (always; RG11) ---
     rain = {"source": "PRISM", "data": [], "cumulativeIn": None}
     try:
-        rain_raw = requestPrismRainData(startTime, endTime)  # Gets RG11 data
-
-        entity = (
-            rain_raw[0]["entityData"][0]
-            if rain_raw and rain_raw[0].get("entityData")
-            else {}
+        # Only readings the rain index doesn't hold (or hasn't settled) are fetched
+        idx = rain_index.ensure(
+            SITE_RAIN_GAUGE, rain_points(SITE_RAIN_GAUGE), start_unix, end_unix
         )
-        data_points = entity.get("data", [])
         series = [
-            {"t": p["dateTime"], "rainIn": p.get("reading")}
-            for p in data_points
-            if p.get("reading") is not None
+            {"t": unix_to_iso(t), "rainIn": v}
+            for t, v in idx.points(start_unix, end_unix)
         ]
         # Cumulative rainfall
-        cumulative = round(
-            sum(p.get("reading") or 0 for p in data_points),
-            2,
-        )
+        cumulative = round(idx.total(start_unix, end_unix), 2)
         rain = {"source": "PRISM", "data": series, "cumulativeIn": cumulative}
     except Exception as e:
         rain = {"source": "PRISM", "data": [], "error": str(e)}
 
     return {
-        "site": {
-            "site_id": site.get("id"),
-            "mh_id": site.get("mh_id"),
-            "mhm_id": site.get("mhm_id"),
-            "ref_source": site.get("ref_source"),
-            "ref_id": site.get("ref_id"),
-            "ref_locId": site.get("ref_locId"),
-            "coordinates": site.get("coordinates"),
-        },
+        "site": site_summary(site),
+        "timeframe": {"start": startTime, "end": endTime},
+        "mhm": mhm,
+        "ref": reference,
+        "rain": rain,
+    }
+
+
+def site_rollup_data(site, startTime, endTime, resolution):
+    """
+    Same response shape as site_data, but every series holds one point per
+    hour/day bucket (mean level, summed rain) plus min/max/count.
+    """
+    start_unix = local_to_unix(startTime)
+    end_unix = local_to_unix(endTime)
+    rollup = {"resolution": resolution, "bucketSeconds": RESOLUTIONS[resolution]}
+
+    def load(series, fetch):
+        store.ensure(series, fetch, start_unix, end_unix)
+        return store.query(series, resolution, start_unix, end_unix)
+
+    # --- MHM (always) ---
+    try:
+        buckets = load(f"mhm:{site['mhm_id']}", mhm_points(site["mhm_id"]))
+        # Device metadata comes back with any page, so ask for just the last hour
+        meta_end = min(end_unix, int(time.time()))
+        mhm_meta = fetchMHMLevelData(meta_end - 3600, meta_end, site["mhm_id"])
+        mhm = {
+            "deviceId": mhm_meta.get("deviceId"),
+            "lastWaterLevelIn": mm_to_inches(mhm_meta.get("lastWaterLevelMm")),
+            "lastFillPercent": mhm_meta.get("lastFillPercent"),
+            "rollup": rollup,
+            "timeSeries": [
+                {
+                    "t": b["t"],
+                    "levelIn": round(b["mean"], 2),
+                    "minIn": round(b["min"], 2),
+                    "maxIn": round(b["max"], 2),
+                    "count": b["count"],
+                }
+                for b in buckets
+            ],
+        }
+    except Exception as e:
+        mhm = {"error": str(e), "rollup": rollup, "timeSeries": []}
+
+    # --- Reference (branch ADS/EBMUD/None) ---
+    ref_source = site.get("ref_source")
+    reference = {"source": None, "meta": {}, "data": []}
+
+    if ref_source in ("ADS", "EBMUD"):
+        if ref_source == "ADS":
+            series = f"ads:{site.get('ref_locId')}"
+            meta = {"locationId": site.get("ref_locId")}
+            fetch = ads_points(site.get("ref_locId"))
+        else:
+            series = f"ebmud:{site.get('tag')}"
+            meta = {"tag": site.get("tag")}
+            fetch = ebmud_points(site.get("tag"))
+        try:
+            buckets = load(series, fetch)
+            reference = {
+                "source": ref_source,
+                "meta": meta,
+                "rollup": rollup,
+                "data": [
+                    {
+                        "dateTime": unix_to_iso(b["t"]),
+                        "reading": round(b["mean"], 2),
+                        "min": round(b["min"], 2),
+                        "max": round(b["max"], 2),
+                        "count": b["count"],
+                    }
+                    for b in buckets
+                ],
+            }
+        except Exception as e:
+            reference = {
+                "source": ref_source,
+                "meta": meta,
+                "data": [],
+                "error": str(e),
+            }
+
+    # --- Rain (always; RG11) ---
+    try:
+        buckets = load(
+            f"rain:{SITE_RAIN_GAUGE}", indexed_rain_points(SITE_RAIN_GAUGE)
+        )
+        # Rollups stop at the settle margin; the rain index also holds the last hour
+        idx = rain_index.ensure(
+            SITE_RAIN_GAUGE, rain_points(SITE_RAIN_GAUGE), start_unix, end_unix
+        )
+        rain = {
+            "source": "PRISM",
+            "rollup": rollup,
+            "data": [
+                {"t": unix_to_iso(b["t"]), "rainIn": round(b["sum"], 2)}
+                for b in buckets
+            ],
+            "cumulativeIn": round(idx.total(start_unix, end_unix), 2),
+        }
+    except Exception as e:
+        rain = {"source": "PRISM", "data": [], "error": str(e)}
+
+    return {
+        "site": site_summary(site),
         "timeframe": {"start": startTime, "end": endTime},
         "mhm": mhm,
         "ref": reference,
@@ -0,0 +1,185 @@
+import threading
+import time
+
+import numpy as np
+
+from api.coverage import add_interval, missing_ranges, settled_until
+
+# Rolling windows used for storm detection, in seconds
+ROLLING_WINDOWS = {"1h": 3600, "6h": 6 * 3600, "24h": 24 * 3600}
+
+# A storm is any event whose rolling total exceeds one of these (inches)
+STORM_THRESHOLDS_IN = {"1h": 0.25, "6h": 0.5, "24h": 1.0}
+
+# Rain separated by at least this long without a reading > 0 is a new event
+EVENT_DRY_GAP_SECONDS = 6 * 3600
+
+
+class GaugeIndex:
+    """Sorted readings for one gauge plus their prefix sums (prefix[0] = 0)."""
+
+    def __init__(self, times=(), values=(), prefix=None):
+        self.times = np.asarray(times, dtype=np.int64)
+        self.values = np.asarray(values, dtype=np.float64)
+        if prefix is None:
+            prefix = np.concatenate(([0.0], np.cumsum(self.values)))
+        self.prefix = prefix
+
+    def replace(self, start_unix, end_unix, points):
+        """
+        Return a new index with the readings in [start_unix, end_unix] swapped for
+        the sorted points [(t, inches), ...]. Prefix sums before the window are
+        reused and the ones after it are shifted, so nothing is re-sorted.
+        """
+        i, j = self.bounds(start_unix, end_unix)
+        times = np.array([t for t, _ in points], dtype=np.int64)
+        values = np.array([v for _, v in points], dtype=np.float64)
+        middle = self.prefix[i] + np.cumsum(values)
+        last = middle[-1] if len(middle) else self.prefix[i]
+        after = self.prefix[j + 1 :] - self.prefix[j] + last
+        return GaugeIndex(
+            np.concatenate((self.times[:i], times, self.times[j:])),
+            np.concatenate((self.values[:i], values, self.values[j:])),
+            np.concatenate((self.prefix[: i + 1], middle, after)),
+        )
+
+    def points(self, start_unix, end_unix):
+        """Readings [(t, inches), ...] with start_unix <= t <= end_unix."""
+        i, j = self.bounds(start_unix, end_unix)
+        return list(zip(self.times[i:j].tolist(), self.values[i:j].tolist()))
+
+    def bounds(self, start_unix, end_unix):
+        """Index range [i, j) of readings with start_unix <= t <= end_unix."""
+        i = int(np.searchsorted(self.times, start_unix, side="left"))
+        j = int(np.searchsorted(self.times, end_unix, side="right"))
+        return i, j
+
+    def total(self, start_unix, end_unix):
+        i, j = self.bounds(start_unix, end_unix)
+        return float(self.prefix[j] - self.prefix[i])
+
+    def rolling(self, seconds, i=0, j=None):
+        """
+        Rain total over (t - seconds, t] ending at each reading in [i, j),
+        counting only readings from index i onwards.
+        """
+        j = len(self.times) if j is None else j
+        times = self.times[i:j]
+        lo = np.searchsorted(self.times, times - seconds, side="right")
+        return self.prefix[i + 1 : j + 1] - self.prefix[np.maximum(lo, i)]
+
+
+class RainIndex:
+    """
+    Prefix-sum index over rain gauge series (RG11 and any other gauge).
+
+    Each gauge records the settled windows it holds as a set of intervals. Window
+    totals are two binary searches and a subtraction; rolling totals for every
+    reading are a single vectorized pass. The index lives in process memory.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.gauges = {}
+        self.covered = {}
+
+    def index(self, gauge):
+        """The GaugeIndex for gauge (empty if nothing is held yet)."""
+        return self.gauges.get(gauge) or GaugeIndex()
+
+    def ingest(self, gauge, points, start_unix, end_unix):
+        """
+        Store readings [(t, inches), ...] fetched for [start_unix, end_unix].
+
+        Readings already held inside that window are replaced. Only the settled part
+        of the window is marked covered, so the newest readings are fetched again
+        on the next request.
+        """
+        end_unix = min(end_unix, int(time.time()))
+        if end_unix < start_unix:
+            return
+        points = sorted((t, v) for t, v in points if start_unix <= t <= end_unix)
+
+        with self.lock:
+            self.gauges[gauge] = self.index(gauge).replace(start_unix, end_unix, points)
+            settled = min(end_unix, settled_until())
+            if settled >= start_unix:
+                self.covered[gauge] = add_interval(
+                    self.covered.get(gauge, []), start_unix, settled
+                )
+
+    def ensure(self, gauge, fetch, start_unix, end_unix):
+        """
+        Make sure [start_unix, end_unix] is indexed for gauge and return its GaugeIndex.
+
+        fetch(start_unix, end_unix) must return [(t, inches), ...]; it is only called
+        for the parts of the window not covered (or not settled) yet. Anything after
+        now is skipped.
+        """
+        end_unix = min(end_unix, int(time.time()))
+        for lo, hi in missing_ranges(self.covered.get(gauge, []), start_unix, end_unix):
+            self.ingest(gauge, fetch(lo, hi), lo, hi)
+        return self.index(gauge)
+
+    def events(self, gauge, start_unix, end_unix):
+        """
+        Summarize rain for gauge over [start_unix, end_unix]:
+        {
+          "cumulativeIn": 1.23,
+          "maxIn": {"1h": {"t": unix, "valueIn": 0.31}, "6h": ..., "24h": ...},
+          "events": [{"start": unix, "end": unix, "totalIn": 0.8,
+                      "peakIn": {"1h": .., "6h": .., "24h": ..}, "storm": True}, ...]
+        }
+        Rolling totals only count rain inside the requested window (or event).
+        """
+        idx = self.index(gauge)
+        i, j = idx.bounds(start_unix, end_unix)
+        times = idx.times[i:j]
+
+        max_in = {}
+        for name, seconds in ROLLING_WINDOWS.items():
+            series = idx.rolling(seconds, i, j)
+            if len(series):
+                k = int(np.argmax(series))
+                max_in[name] = {
+                    "t": int(times[k]),
+                    "valueIn": round(float(series[k]), 2),
+                }
+            else:
+                max_in[name] = {"t": None, "valueIn": 0.0}
+
+        # Split the wet readings wherever the dry gap between them is long enough
+        wet = np.flatnonzero(idx.values[i:j] > 0)
+        events = []
+        if len(wet):
+            breaks = np.flatnonzero(np.diff(times[wet]) >= EVENT_DRY_GAP_SECONDS)
+            firsts = np.concatenate(([0], breaks + 1))
+            lasts = np.concatenate((breaks, [len(wet) - 1]))
+            for a, b in zip(wet[firsts], wet[lasts]):
+                peak = {
+                    name: round(float(idx.rolling(seconds, i + a, i + b + 1).max()), 2)
+                    for name, seconds in ROLLING_WINDOWS.items()
+                }
+                events.append(
+                    {
+                        "start": int(times[a]),
+                        "end": int(times[b]),
+                        "totalIn": round(
+                            float(idx.prefix[i + b + 1] - idx.prefix[i + a]), 2
+                        ),
+                        "peakIn": peak,
+                        "storm": any(
+                            peak[name] >= limit
+                            for name, limit in STORM_THRESHOLDS_IN.items()
+                        ),
+                    }
+                )
+
+        return {
+            "cumulativeIn": round(float(idx.prefix[j] - idx.prefix[i]), 2),
+            "maxIn": max_in,
+            "events": events,
+        }
+
+
+rain_index = RainIndex()
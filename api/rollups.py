@@ -0,0 +1,238 @@
+import os
+import sqlite3
+import tempfile
+import threading
+from datetime import datetime, time as dt_time
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+from api.coverage import add_interval, contains, missing_ranges, settled_until
+
+# The rollup store is a per-instance cache, not a durable database. By default it is
+# a SQLite file in the temp directory, which on Vercel-style serverless functions
+# lives only as long as one instance: every cold start rebuilds rollups from raw
+# data and instances share nothing. Point ROLLUP_DB_PATH at persistent disk when
+# running a long-lived server to keep it between restarts.
+ROLLUP_DB_PATH = os.getenv("ROLLUP_DB_PATH") or os.path.join(
+    tempfile.gettempdir(), "mhmdash_rollups.sqlite3"
+)
+
+# PRISM/PI timestamps and the dashboard's start/end times are naive local wall-clock
+# strings. All rollup timestamps are true UNIX seconds, and daily buckets start at
+# local midnight, so MHM (UTC) and PRISM/PI (local) series share the same days.
+LOCAL_TZ = ZoneInfo(os.getenv("SITE_TIMEZONE") or "America/Los_Angeles")
+
+# Nominal bucket widths in seconds (local days are 23h/25h across DST changes)
+RESOLUTIONS = {"hour": 3600, "day": 86400}
+
+# Windows longer than these are served from rollups instead of raw points
+HOURLY_THRESHOLD_SECONDS = 7 * 86400
+DAILY_THRESHOLD_SECONDS = 90 * 86400
+
+# Missing ranges are fetched and saved in chunks this long, so a request that times
+# out part way through a cold fill keeps what it already ingested
+FETCH_CHUNK_SECONDS = 7 * 86400
+
+
+def pick_resolution(start_unix, end_unix):
+    """Return "hour"/"day" when the window is long enough to use rollups, else None."""
+    span = end_unix - start_unix
+    if span > DAILY_THRESHOLD_SECONDS:
+        return "day"
+    if span > HOURLY_THRESHOLD_SECONDS:
+        return "hour"
+    return None
+
+
+def local_to_unix(value):
+    """Like to_unix_seconds, but naive datetimes/strings are read as LOCAL_TZ time."""
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    if not isinstance(value, datetime):
+        raise ValueError(
+            "start_time/end_time must be UNIX seconds, ISO8601 string, or datetime"
+        )
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=LOCAL_TZ)
+    return int(value.timestamp())
+
+
+def unix_to_iso(ts):
+    """Format UNIX seconds as the local 'YYYY-MM-DDTHH:MM:SS' strings PRISM/PI use."""
+    return datetime.fromtimestamp(ts, tz=LOCAL_TZ).strftime("%Y-%m-%dT%H:%M:%S")
+
+
+@lru_cache(maxsize=65536)
+def _local_midnight(hour):
+    day = datetime.fromtimestamp(hour * 3600, tz=LOCAL_TZ).date()
+    return int(datetime.combine(day, dt_time(), tzinfo=LOCAL_TZ).timestamp())
+
+
+def bucket_start(resolution, t):
+    """Start (UNIX seconds) of the hour or local day containing t."""
+    if resolution == "day":
+        return _local_midnight(t // 3600)
+    return t - t % RESOLUTIONS[resolution]
+
+
+class RollupStore:
+    """
+    Min/max/sum/count per series per hour and per day, cached in SQLite
+    (see ROLLUP_DB_PATH). The connection is opened on first use.
+
+    Each series also records the raw windows it has ingested as a set of intervals,
+    so new raw data is only fetched for the parts of a request outside them.
+    """
+
+    def __init__(self, path=ROLLUP_DB_PATH):
+        self.path = path
+        self.lock = threading.RLock()
+        self._conn = None
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            with self.lock:
+                if self._conn is None:
+                    self._conn = self._connect()
+        return self._conn
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS rollup_buckets (
+                series TEXT NOT NULL,
+                resolution TEXT NOT NULL,
+                bucket INTEGER NOT NULL,
+                vmin REAL NOT NULL,
+                vmax REAL NOT NULL,
+                vsum REAL NOT NULL,
+                vcount INTEGER NOT NULL,
+                PRIMARY KEY (series, resolution, bucket)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS coverage_intervals (
+                series TEXT NOT NULL,
+                start_unix INTEGER NOT NULL,
+                end_unix INTEGER NOT NULL,
+                PRIMARY KEY (series, start_unix)
+            ) WITHOUT ROWID;
+            """
+        )
+        conn.commit()
+        return conn
+
+    def coverage(self, series):
+        """Return the sorted, disjoint [(start_unix, end_unix), ...] ingested for series."""
+        rows = self.conn.execute(
+            """
+            SELECT start_unix, end_unix FROM coverage_intervals
+            WHERE series = ? ORDER BY start_unix
+            """,
+            (series,),
+        ).fetchall()
+        return [tuple(row) for row in rows]
+
+    def ingest(self, series, points, start_unix, end_unix):
+        """
+        Fold raw points [(t, value), ...] fetched for [start_unix, end_unix] into the rollups.
+
+        Points inside the existing coverage are skipped, so ingesting the same window
+        twice is harmless.
+        """
+        if end_unix < start_unix:
+            return
+        with self.lock:
+            cov = self.coverage(series)
+
+            buckets = {}
+            for t, value in points:
+                if value is None or t < start_unix or t > end_unix:
+                    continue
+                if contains(cov, t):
+                    continue
+                for resolution in RESOLUTIONS:
+                    key = (resolution, bucket_start(resolution, t))
+                    agg = buckets.get(key)
+                    if agg is None:
+                        buckets[key] = [value, value, value, 1]
+                    else:
+                        agg[0] = min(agg[0], value)
+                        agg[1] = max(agg[1], value)
+                        agg[2] += value
+                        agg[3] += 1
+
+            self.conn.executemany(
+                """
+                INSERT INTO rollup_buckets (series, resolution, bucket, vmin, vmax, vsum, vcount)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (series, resolution, bucket) DO UPDATE SET
+                    vmin = MIN(vmin, excluded.vmin),
+                    vmax = MAX(vmax, excluded.vmax),
+                    vsum = vsum + excluded.vsum,
+                    vcount = vcount + excluded.vcount
+                """,
+                [
+                    (series, resolution, bucket, *agg)
+                    for (resolution, bucket), agg in buckets.items()
+                ],
+            )
+            self.conn.execute(
+                "DELETE FROM coverage_intervals WHERE series = ?", (series,)
+            )
+            self.conn.executemany(
+                """
+                INSERT INTO coverage_intervals (series, start_unix, end_unix)
+                VALUES (?, ?, ?)
+                """,
+                [
+                    (series, lo, hi)
+                    for lo, hi in add_interval(cov, start_unix, end_unix)
+                ],
+            )
+            self.conn.commit()
+
+    def ensure(self, series, fetch, start_unix, end_unix):
+        """
+        Make sure [start_unix, end_unix] is rolled up for series.
+
+        fetch(start_unix, end_unix) must return raw points [(t, value), ...]; it is only
+        called for the parts of the window not covered yet, never for gaps outside it,
+        one FETCH_CHUNK_SECONDS chunk at a time. Each chunk is ingested as soon as
+        it arrives. Data newer than SETTLE_SECONDS is never ingested.
+        """
+        end_unix = min(end_unix, settled_until())
+        for lo, hi in missing_ranges(self.coverage(series), start_unix, end_unix):
+            for chunk_lo in range(lo, hi + 1, FETCH_CHUNK_SECONDS):
+                chunk_hi = min(chunk_lo + FETCH_CHUNK_SECONDS - 1, hi)
+                self.ingest(series, fetch(chunk_lo, chunk_hi), chunk_lo, chunk_hi)
+
+    def query(self, series, resolution, start_unix, end_unix):
+        """
+        Return buckets for series overlapping [start_unix, end_unix]:
+        [{"t": bucketStartUnix, "min": ..., "max": ..., "mean": ..., "sum": ..., "count": ...}, ...]
+        """
+        rows = self.conn.execute(
+            """
+            SELECT bucket, vmin, vmax, vsum, vcount FROM rollup_buckets
+            WHERE series = ? AND resolution = ? AND bucket >= ? AND bucket <= ?
+            ORDER BY bucket
+            """,
+            (series, resolution, bucket_start(resolution, start_unix), end_unix),
+        ).fetchall()
+        return [
+            {
+                "t": bucket,
+                "min": vmin,
+                "max": vmax,
+                "mean": vsum / vcount,
+                "sum": vsum,
+                "count": vcount,
+            }
+            for bucket, vmin, vmax, vsum, vcount in rows
+        ]
+
+
+store = RollupStore()
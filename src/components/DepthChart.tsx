@@ -20,6 +20,7 @@ export function DepthChart({ site, data }) {
   const mhmData = data?.mhmData;
   const refData = data?.refData;
   const rainfallData = data?.rainData;
+  const rainEvents = data?.rainEvents;
   console.log('Data:', data);
 
   const hasMhmData = mhmData?.timeSeries && mhmData.timeSeries.length > 0;
@@ -167,7 +168,10 @@ export function DepthChart({ site, data }) {
     };
 
     // Create time intervals (every 15 minutes for better visualization)
-    const interval = 15 * 60 * 1000; // 15 minutes in milliseconds
+    // Long windows come back as hourly/daily rollups, so step one bucket at a time
+    const bucketMs = (mhmData.rollup?.bucketSeconds ?? 0) * 1000;
+    const interval = bucketMs || 15 * 60 * 1000; // 15 minutes in milliseconds
+    const tolerance = bucketMs ? bucketMs / 2 : 30 * 60 * 1000;
 
     for (let time = timeRange.start; time <= timeRange.end; time += interval) {
       const date = new Date(time);
@@ -189,8 +193,8 @@ export function DepthChart({ site, data }) {
           ? curr
           : prev
       );
-      if (Math.abs(closestMhm.timestamp - time) < 30 * 60 * 1000) {
-        // Within 30 minutes
+      if (Math.abs(closestMhm.timestamp - time) < tolerance) {
+        // Within 30 minutes (half a bucket for rollups)
         point.mhmLevel = closestMhm.mhmLevel;
       }
 
@@ -200,8 +204,8 @@ export function DepthChart({ site, data }) {
           ? curr
           : prev
       );
-      if (Math.abs(closestRef.timestamp - time) < 30 * 60 * 1000) {
-        // Within 30 minutes
+      if (Math.abs(closestRef.timestamp - time) < tolerance) {
+        // Within 30 minutes (half a bucket for rollups)
         point.refLevel = closestRef.refLevel;
       }
 
@@ -212,8 +216,8 @@ export function DepthChart({ site, data }) {
             ? curr
             : prev
         );
-        if (Math.abs(closestRain.timestamp - time) < 30 * 60 * 1000) {
-          // Within 30 minutes
+        if (Math.abs(closestRain.timestamp - time) < tolerance) {
+          // Within 30 minutes (half a bucket for rollups)
           point.rainfall = closestRain.rainfall;
         }
       }
@@ -439,8 +443,22 @@ export function DepthChart({ site, data }) {
                 Max: {rainfallStats.max.toFixed(3)}"
               </div>
               <div className="text-muted-foreground">
-                Events: {rainfallStats.nonZeroEvents}
+                Wet Intervals: {rainfallStats.nonZeroEvents}
               </div>
+              {rainEvents?.maxIn && (
+                <div className="text-muted-foreground">
+                  Max 1h/6h/24h: {rainEvents.maxIn['1h'].valueIn.toFixed(2)}" /{' '}
+                  {rainEvents.maxIn['6h'].valueIn.toFixed(2)}" /{' '}
+                  {rainEvents.maxIn['24h'].valueIn.toFixed(2)}"
+                </div>
+              )}
+              {rainEvents?.events && (
+                <div className="text-muted-foreground">
+                  Storms:{' '}
+                  {rainEvents.events.filter((e) => e.storm).length} of{' '}
+                  {rainEvents.events.length} rain events
+                </div>
+              )}
               <div className="text-muted-foreground">
                 Data Points: {rainfallData.data.length}
               </div>
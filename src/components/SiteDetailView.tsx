@@ -26,6 +26,7 @@ export const SiteDetailView = ({ site, onClose }) => {
   const [mhmData, setMhmData] = useState(null); // MHM Data
   const [refData, setRefData] = useState(null); // ADS or EBMUD data
   const [rainData, setRainData] = useState(null); // RG11 data
+  const [rainEvents, setRainEvents] = useState(null); // RG11 rolling maxima & storm events
   const [loading, setLoading] = useState(false);
 
   const base =
@@ -74,8 +75,11 @@ export const SiteDetailView = ({ site, onClose }) => {
   };
 
   // Function to Fetch MHM, Ref Data, and RG data from API's
-  const fetchSiteData = async (site, startTime, endTime) => {
+  // signal aborts the requests when the site or window changes, so a late
+  // response for the old window can't overwrite the new one
+  const fetchSiteData = async (site, startTime, endTime, signal) => {
     setLoading(true);
+    setRainEvents(null); // don't show the previous window's storms next to new data
     try {
       const res = await fetch(`${base}/api/py/site_data`, {
         method: 'POST',
@@ -85,6 +89,7 @@ export const SiteDetailView = ({ site, onClose }) => {
           startTime,
           endTime,
         }),
+        signal,
       });
       if (!res.ok) throw new Error(await res.text());
 
@@ -95,15 +100,35 @@ export const SiteDetailView = ({ site, onClose }) => {
       setRefData(data.ref);
       setRainData(data.rain);
     } catch (e) {
+      if (signal.aborted) return;
       console.error('site_data error:', e);
     } finally {
-      setLoading(false);
+      if (!signal.aborted) setLoading(false);
+    }
+
+    // Rain events reuse the RG11 readings site_data loaded into the rain index
+    // (on both the raw and the rollup path), so only the unsettled tail is refetched
+    try {
+      const res = await fetch(`${base}/api/py/rain_events`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ startTime, endTime }),
+        signal,
+      });
+      if (!res.ok) throw new Error(await res.text());
+      setRainEvents(await res.json());
+    } catch (e) {
+      if (signal.aborted) return;
+      setRainEvents(null);
+      console.error('rain_events error:', e);
     }
   };
   
   // Invoke fetch function when site or times change.
   useEffect(() => {
-    fetchSiteData(site, startTime, endTime);
+    const controller = new AbortController();
+    fetchSiteData(site, startTime, endTime, controller.signal);
+    return () => controller.abort();
   }, [site, startTime, endTime]);
 
   return (
@@ -217,7 +242,10 @@ export const SiteDetailView = ({ site, onClose }) => {
                   </span>
                 </div>
               ) : mhmData || refData ? (
-                <DepthChart site={site} data={{ mhmData, refData, rainData }} />
+                <DepthChart
+                  site={site}
+                  data={{ mhmData, refData, rainData, rainEvents }}
+                />
               ) : (
                 <div className="text-center py-8 text-gray-500">
                   Data Could Not Be Loaded